@@ -1,8 +1,17 @@
 import os
 import re
 import json
+import time
+import atexit
+import queue
+import shutil
 import hashlib
+import logging
 import sqlite3
+import functools
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Any, Dict
 
@@ -10,7 +19,6 @@ from flask import (
     Flask, render_template, request, redirect, url_for, flash,
     send_from_directory, jsonify
 )
-from werkzeug.utils import secure_filename
 
 # -----------------------------------------------------------------------------
 # Flask app setup
@@ -18,11 +26,23 @@ from werkzeug.utils import secure_filename
 app = Flask(__name__, static_folder="static", template_folder="templates")
 app.config["SECRET_KEY"] = os.environ.get("FLASK_SECRET_KEY", "dev-secret")
 app.config["MAX_CONTENT_LENGTH"] = 30 * 1024 * 1024  # 30 MB uploads
+# When fronted by nginx/apache, let the proxy stream upload bytes with
+# sendfile(2) via X-Sendfile/X-Accel-Redirect instead of this process.
+app.config["USE_X_SENDFILE"] = os.environ.get("USE_X_SENDFILE", "0") == "1"
 
 APP_ROOT = app.root_path
 UPLOAD_DIR = os.path.join(APP_ROOT, "static", "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Request-path logging only enqueues a record; the listener thread does the
+# actual stream I/O, so workers never block on (or contend for) stdout.
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+logger = logging.getLogger("asset_capture")
+logger.setLevel(logging.INFO)
+logger.addHandler(QueueHandler(_log_queue))
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+
 # DB path (override with env QR_CODES_DB_PATH if needed)
 DB_PATH = os.environ.get(
     "QR_CODES_DB_PATH",
@@ -49,99 +69,277 @@ def _safe_str(x: Any) -> str:
     except Exception:
         return ""
 
+# Compiled once; sanitize_component runs several times per submit (once per
+# component per saved file) and per-call re.compile lookups add up.
+_RE_DIGITS   = re.compile(r'(\d{6,})')
+_RE_SCHEME   = re.compile(r'^[a-zA-Z]+:')
+_RE_ILLEGAL  = re.compile(r'[<>:"/\\|?*]+')
+_RE_WS       = re.compile(r'\s+')
+_RE_NONALNUM = re.compile(r'[^A-Za-z0-9._-]+')
+
+# Constant by construction — no need to rebuild a hash object per call.
+_FALLBACK_ID = hashlib.sha1(b'fallback').hexdigest()[:8]
+
+@functools.lru_cache(maxsize=1024)
 def sanitize_component(s: str, *, prefer_digits: bool = True, maxlen: int = 80) -> str:
     s = (s or "").strip()
     if prefer_digits:
-        m = re.search(r'(\d{6,})', s)
+        m = _RE_DIGITS.search(s)
         if m:
             s = m.group(1)
-    s = re.sub(r'^[a-zA-Z]+:', '', s).strip('/')
-    s = re.sub(r'[<>:"/\\|?*]+', '_', s)
-    s = re.sub(r'\s+', '_', s)
-    s = re.sub(r'[^A-Za-z0-9._-]+', '', s).strip('._-')
+    s = _RE_SCHEME.sub('', s).strip('/')
+    s = _RE_ILLEGAL.sub('_', s)
+    s = _RE_WS.sub('_', s)
+    s = _RE_NONALNUM.sub('', s).strip('._-')
     if not s:
-        s = hashlib.sha1(b'fallback').hexdigest()[:8]
+        s = _FALLBACK_ID
     return s[:maxlen]
 
+# The UI only ever sends a handful of values; resolve those with one dict
+# lookup and keep the prefix checks as the fallback for free-form input.
+_ASSET_ABBREV = {
+    "mechanical": "ME",
+    "electrical": "EL",
+    "backflow":   "BF",
+    "back flow":  "BF",
+    "back-flow":  "BF",
+}
+
 def map_asset_type_to_abbrev(t: str) -> str:
     t = (t or "").strip().lower()
+    abbrev = _ASSET_ABBREV.get(t)
+    if abbrev:
+        return abbrev
     if t.startswith("mech"): return "ME"
     if t.startswith("elec"): return "EL"
     # Handles "Back Flow", "Backflow", "Back-Flow", etc.
     if t.startswith("back"): return "BF"
     return t[:2].upper() or "AS"
 
-def seq_to_label(asset_type: str, seq: str) -> str:
-    """
-    Map the photo sequence to a friendly label per asset type.
-    - Mechanical: 0 Asset Plate, 1 UBC Tag, 2 Main Asset Photo, 3 Technical Safety BC
-    - Back Flow:  0 Asset Plate, 1 Asset Plate (additional), 2 Main Photo
-    - Others:     0 Asset Plate, 1 UBC Tag, 2 Main Asset Photo
-    """
+# Photo-sequence labels per asset type:
+# - Mechanical: 0 Asset Plate, 1 UBC Tag, 2 Main Asset Photo, 3 Technical Safety BC
+# - Back Flow:  0 Asset Plate, 1 Asset Plate (additional), 2 Main Photo
+# - Others:     0 Asset Plate, 1 UBC Tag, 2 Main Asset Photo
+_MECH_LABELS  = {0: "Asset Plate", 1: "UBC Tag", 2: "Main Asset Photo", 3: "Technical Safety BC"}
+_BF_LABELS    = {0: "Asset Plate", 1: "Asset Plate (additional)", 2: "Main Photo"}
+_OTHER_LABELS = {0: "Asset Plate", 1: "UBC Tag", 2: "Main Asset Photo"}
+
+def _labels_for_type(asset_type: str) -> Dict[int, str]:
     t = (asset_type or "").strip().lower()
+    if t == "mechanical":
+        return _MECH_LABELS
+    if t in ("back flow", "backflow", "back-flow", "bf", "back"):
+        return _BF_LABELS
+    return _OTHER_LABELS
+
+def seq_to_label(asset_type: str, seq: str) -> str:
+    """Map the photo sequence to a friendly label per asset type."""
     try:
         i = int(seq)
     except Exception:
         return "Photo"
-
-    if t == "mechanical":
-        mech_map = {0: "Asset Plate", 1: "UBC Tag", 2: "Main Asset Photo", 3: "Technical Safety BC"}
-        return mech_map.get(i, f"Photo {i}")
-
-    if t in ("back flow", "backflow", "back-flow", "bf", "back"):
-        bf_map = {0: "Asset Plate", 1: "Asset Plate (additional)", 2: "Main Photo"}
-        return bf_map.get(i, f"Photo {i}")
-
-    other_map = {0: "Asset Plate", 1: "UBC Tag", 2: "Main Asset Photo"}
-    return other_map.get(i, f"Photo {i}")
+    return _labels_for_type(asset_type).get(i, f"Photo {i}")
 
 # -----------------------------------------------------------------------------
 # Image saver  (optional Pillow with fallback)
 # -----------------------------------------------------------------------------
-def save_image_file(storage, dest_path: str):
+# Pillow decode + re-encode is CPU-bound (up to seconds per 30 MB upload) and
+# the four files of a submit are independent, so recompression runs here
+# instead of on the request thread. Threads rather than processes: libjpeg
+# releases the GIL during encode/decode, and threads survive the dev reloader.
+_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 2)
+
+def _recompress_image(dest_path: str):
+    """Re-encode an already-saved JPEG upload (background worker).
+
+    Only queued for .jpg/.jpeg destinations — re-encoding PNG/WebP/etc.
+    costs a full decode+encode for nothing. Writes to a sibling temp file
+    and os.replace()s it in, so a concurrent /uploads read always sees
+    either the raw original or the finished re-encode, never a partial file.
     """
-    Save an uploaded image to disk.
-    - If Pillow is available, convert RGBA/P to RGB for JPEGs and optimize.
-    - Otherwise, fall back to Werkzeug's storage.save().
+    tmp_path = dest_path + ".enc"
+    try:
+        from PIL import Image  # optional
+        # Uploads come from our own capture UI; skip the decompression-bomb
+        # guard so large phone photos don't raise DecompressionBombError.
+        Image.MAX_IMAGE_PIXELS = None
+        img = Image.open(dest_path)
+        if img.mode in ("RGBA", "P"):
+            img = img.convert("RGB")
+        # Baseline JPEG with 4:2:0 subsampling keeps the encoder on its
+        # fastest path (and the fast-DCT kernels when libjpeg-turbo /
+        # Pillow-SIMD is installed).
+        img.save(tmp_path, format="JPEG", quality=90, optimize=True,
+                 progressive=False, subsampling=2)
+        img.close()
+        os.replace(tmp_path, dest_path)
+    except Exception:
+        # Keep the raw upload as saved; drop any partial temp file.
+        try: os.remove(tmp_path)
+        except OSError: pass
+    _make_thumbnail(dest_path)
+
+def _thumb_name(filename: str) -> str:
+    return os.path.splitext(filename)[0] + ".thumb.webp"
+
+def _make_thumbnail(dest_path: str):
+    """Write a small WebP next to the original for capture-page previews.
+
+    Same temp-file + os.replace() dance as _recompress_image: the capture
+    page may request the thumbnail while the worker is still writing it.
     """
+    thumb_path = _thumb_name(dest_path)
+    tmp_path = thumb_path + ".enc"
     try:
         from PIL import Image  # optional
-        import io as _io
-        storage.stream.seek(0)
-        data = storage.read()
-        storage.stream.seek(0)
-        ext = os.path.splitext(dest_path)[1].lower()
-        try:
-            img = Image.open(_io.BytesIO(data))
-            if ext in (".jpg", ".jpeg"):
-                if img.mode in ("RGBA", "P"):
-                    img = img.convert("RGB")
-                img.save(dest_path, format="JPEG", quality=90, optimize=True)
-            else:
-                img.save(dest_path)
-        except Exception:
-            with open(dest_path, "wb") as f:
-                f.write(data)
+        img = Image.open(dest_path)
+        if img.mode in ("RGBA", "P"):
+            img = img.convert("RGB")
+        img.thumbnail((256, 256))
+        img.save(tmp_path, "WEBP", quality=70, method=4)
+        img.close()
+        os.replace(tmp_path, thumb_path)
     except Exception:
-        storage.save(dest_path)
+        # Listing falls back to the full image; drop any partial temp file.
+        try: os.remove(tmp_path)
+        except OSError: pass
+
+# Mobile-captured frames are usually already small, correctly-encoded JPEGs;
+# re-encoding those wastes the whole decode+encode and slightly degrades them.
+_PASSTHRU_MAX_BYTES = 2_000_000
+_JPEG_SOI = b"\xff\xd8\xff"
+_PNG_SIG  = b"\x89PNG\r\n\x1a\n"
+
+def _already_compressed(dest_path: str, ext: str) -> bool:
+    try:
+        if os.path.getsize(dest_path) >= _PASSTHRU_MAX_BYTES:
+            return False
+        with open(dest_path, "rb") as f:
+            head = f.read(8)
+    except OSError:
+        return False
+    if ext in (".jpg", ".jpeg"):
+        return head[:3] == _JPEG_SOI
+    if ext == ".png":
+        return head == _PNG_SIG
+    return False
+
+def save_image_file(storage, dest_path: str):
+    """
+    Save an uploaded image to disk.
+    Raw bytes land synchronously (the response lists the file right away);
+    the Pillow optimize pass is queued on the background executor unless the
+    upload is already a small, valid JPEG/PNG.
+    """
+    storage.stream.seek(0)
+    # 1 MiB copy chunks keep the working set bounded regardless of upload
+    # size (vs. reading a 30 MB file into one bytes object); Pillow later
+    # reads from the on-disk path with its own buffered reader.
+    with open(dest_path, "wb") as f:
+        shutil.copyfileobj(storage.stream, f, 1024 * 1024)
+    ext = os.path.splitext(dest_path)[1].lower()
+    if ext in (".jpg", ".jpeg") and not _already_compressed(dest_path, ext):
+        # Worker generates the thumbnail after the re-encode.
+        _EXECUTOR.submit(_recompress_image, dest_path)
+    else:
+        # Streamed copy is final (non-JPEG or already small); thumbnail only.
+        _EXECUTOR.submit(_make_thumbnail, dest_path)
 
 # -----------------------------------------------------------------------------
 # SQLite helpers
 # -----------------------------------------------------------------------------
 def _open_db():
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    return sqlite3.connect(DB_PATH)
+    return sqlite3.connect(DB_PATH, check_same_thread=False)
+
+# One long-lived connection per worker thread: opening SQLite per request pays
+# file-open + page-cache warm-up on every hit, and sqlite3's statement cache
+# only helps if the connection survives across requests.
+_tls = threading.local()
+_POOL_CONNS: List[sqlite3.Connection] = []
+_POOL_LOCK = threading.Lock()
+
+def _get_conn() -> sqlite3.Connection:
+    conn = getattr(_tls, "conn", None)
+    if conn is None:
+        conn = _open_db()
+        conn.row_factory = sqlite3.Row  # name-based access at C level
+        # One fsync per commit instead of several, and readers don't block
+        # the writer. Applied once per connection.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache per connection
+        _init_db_once(conn)
+        _tls.conn = conn
+        with _POOL_LOCK:
+            _POOL_CONNS.append(conn)
+    return conn
+
+@app.teardown_appcontext
+def _rollback_on_error(exc):
+    # Pooled connections outlive the request, so a failed one must not leak
+    # an open transaction into the next request on this thread.
+    if exc is None:
+        return
+    conn = getattr(_tls, "conn", None)
+    if conn is not None:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+
+@atexit.register
+def _close_pooled_conns():
+    with _POOL_LOCK:
+        for conn in _POOL_CONNS:
+            try:
+                # Let SQLite refresh planner statistics while we still can;
+                # near-free when nothing changed.
+                conn.execute("PRAGMA optimize")
+                conn.close()
+            except Exception:
+                pass
+        _POOL_CONNS.clear()
+
+# Schema metadata (table names, columns) never changes within a process
+# lifetime, so resolve it once instead of re-running PRAGMA/sqlite_master
+# queries on every request.
+_COLUMNS_CACHE: Dict[str, List[str]] = {}
+_TABLE_EXISTS_CACHE: Dict[str, bool] = {}
+_ASSETS_TABLE: str | None = None
+
+def _invalidate_schema_cache():
+    """Reset cached schema metadata; call after any DDL beyond startup init."""
+    global _ASSETS_TABLE, _ASSETS_INSERT_PREFIX, _ASSETS_ROW_PLACEHOLDER
+    _COLUMNS_CACHE.clear()
+    _TABLE_EXISTS_CACHE.clear()
+    _ASSETS_TABLE = None
+    _ASSETS_INSERT_PREFIX = None
+    _ASSETS_ROW_PLACEHOLDER = None
 
 def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
-    cur = conn.execute(f'PRAGMA table_info("{table}")')
-    return [row[1] for row in cur.fetchall()]
+    cols = _COLUMNS_CACHE.get(table)
+    if cols is None:
+        cur = conn.execute(f'PRAGMA table_info("{table}")')
+        cols = [row[1] for row in cur.fetchall()]
+        if cols:  # don't cache misses; the table may be created later
+            _COLUMNS_CACHE[table] = cols
+    return cols
 
 def _has_table(conn: sqlite3.Connection, table: str) -> bool:
+    key = table.lower()
+    hit = _TABLE_EXISTS_CACHE.get(key)
+    if hit is not None:
+        return hit
     cur = conn.execute(
         "SELECT name FROM sqlite_master WHERE type='table' AND lower(name)=lower(?)",
         (table,),
     )
-    return cur.fetchone() is not None
+    found = cur.fetchone() is not None
+    if found:  # don't cache misses; the table may be created later
+        _TABLE_EXISTS_CACHE[key] = True
+    return found
 
 def _quote_ident(s: str) -> str:
     return '"' + s.replace('"', '""') + '"'
@@ -151,26 +349,63 @@ def _list_tables(conn: sqlite3.Connection) -> List[str]:
     return [r[0] for r in cur.fetchall()]
 
 def _find_assets_table(conn: sqlite3.Connection) -> str | None:
+    global _ASSETS_TABLE
+    if _ASSETS_TABLE is not None:
+        return _ASSETS_TABLE
     names = _list_tables(conn)
     for candidate in ["QR_code_assets", "QR_codes_assets"]:
         for n in names:
             if n.lower() == candidate.lower():
+                _ASSETS_TABLE = n
                 return n
     for n in names:
         l = n.lower()
         if "qr" in l and "code" in l and "asset" in l:
+            _ASSETS_TABLE = n
             return n
     return None
 
+# One-time DDL (unique indexes backing the hot lookups) lives here instead of
+# in the per-request helpers; pragmas stay per-connection in _get_conn.
+_DB_READY = False
+_DB_LOCK = threading.Lock()
+
+def _init_db_once(conn: sqlite3.Connection):
+    global _DB_READY
+    if _DB_READY:
+        return
+    with _DB_LOCK:
+        if _DB_READY:
+            return
+        try:
+            if _has_table(conn, "QR_codes") and "QR_code_ID" in _table_columns(conn, "QR_codes"):
+                conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS "ux_qr_codes_id" ON "QR_codes" ("QR_code_ID")')
+            assets = _find_assets_table(conn)
+            if assets and "code_assets" in _table_columns(conn, assets):
+                conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "ux_{assets}_code_assets" ON "{assets}" ("code_assets")')
+            # Refresh planner stats so the indexes created above are used
+            # from the first query on.
+            conn.execute("PRAGMA optimize")
+            conn.commit()
+        except Exception:
+            pass  # read-only or legacy DB; lookups still work, just slower
+        _DB_READY = True
+
 # -----------------------------------------------------------------------------
 # Buildings (value=code, label=name)
 # -----------------------------------------------------------------------------
+# Candidate column names, normalized once (lowercase, underscores as spaces)
+# so matching a column is a single set lookup instead of a cols x keys scan.
+_BLDG_CODE_KEYS = {k.lower().replace("_", " ") for k in
+                   ("Code", "Building Code", "Bldg Code", "Bldg_Num", "Bldg Number", "Property", "Bldg")}
+_BLDG_NAME_KEYS = {k.lower().replace("_", " ") for k in
+                   ("Name", "Building Name", "Building_Name", "Description", "Building")}
+
 def _load_buildings_from_sqlite() -> List[Dict[str, str]]:
     if not os.path.exists(DB_PATH):
         return []
-    conn = None
     try:
-        conn = _open_db()
+        conn = _get_conn()
         cur = conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
         tables = [r[0] for r in cur.fetchall()]
         candidates = [t for t in tables if t.lower() == "buildings"] or \
@@ -180,51 +415,56 @@ def _load_buildings_from_sqlite() -> List[Dict[str, str]]:
         table = candidates[0]
         cols = _table_columns(conn, table)
 
-        code_keys = ["Code", "Building Code", "Bldg Code", "Bldg_Num", "Bldg Number", "Property", "Bldg"]
-        name_keys = ["Name", "Building Name", "Building_Name", "Description", "Building"]
-
-        code_col = next((c for c in cols for ck in code_keys
-                         if c.lower().replace("_"," ") == ck.lower().replace("_"," ")), None)
-        name_col = next((c for c in cols for nk in name_keys
-                         if c.lower().replace("_"," ") == nk.lower().replace("_"," ")), None)
+        code_col = next((c for c in cols if c.lower().replace("_", " ") in _BLDG_CODE_KEYS), None)
+        name_col = next((c for c in cols if c.lower().replace("_", " ") in _BLDG_NAME_KEYS), None)
 
         items: List[Dict[str,str]] = []
         if code_col:
             if not name_col: name_col = code_col
+            # Stream rows as the cursor produces them instead of
+            # materializing the whole table with fetchall first.
             cur = conn.execute(f'SELECT {_quote_ident(code_col)}, {_quote_ident(name_col)} FROM "{table}"')
-            for code, name in cur.fetchall():
+            for code, name in cur:
                 c = _safe_str(code); n = _safe_str(name)
                 if c: items.append({"code": c, "name": n or c})
         else:
             cur = conn.execute(f'SELECT * FROM "{table}"')
-            rows = cur.fetchall(); cols = _table_columns(conn, table)
-            for r in rows:
-                row = dict(zip(cols, r))
+            for row in cur:
                 code_guess = ""; name_guess = ""
-                for v in row.values():
+                for v in row:
                     vs = _safe_str(v)
                     if vs.isdigit(): code_guess = vs; break
-                for v in row.values():
+                for v in row:
                     vs = _safe_str(v)
                     if vs and not vs.isdigit(): name_guess = vs; break
                 if code_guess:
                     items.append({"code": code_guess, "name": name_guess or code_guess})
 
-        seen = set(); out = []
-        for it in sorted(items, key=lambda d: d["name"].upper()):
-            if it["code"] not in seen:
-                seen.add(it["code"]); out.append(it)
-        return out
+        # Dedupe first (first occurrence wins, as before), then sort only the
+        # survivors — one pass instead of sorting duplicates we'll discard.
+        dedup: Dict[str, Dict[str, str]] = {}
+        for it in items:
+            dedup.setdefault(it["code"], it)
+        return sorted(dedup.values(), key=lambda d: d["name"].upper())
     except Exception:
         return []
-    finally:
-        try:
-            if conn: conn.close()
-        except Exception:
-            pass
+
+# Keyed on the DB file's mtime so the table is only re-read (and re-sorted)
+# when the file actually changes; the lock keeps concurrent first hits from
+# rebuilding in parallel.
+_BLDG_CACHE: Dict[str, Any] = {"mtime": None, "data": None}
+_BLDG_LOCK = threading.Lock()
 
 def get_building_options() -> List[Dict[str, str]]:
-    opts = _load_buildings_from_sqlite()
+    try:
+        mtime_ns = os.stat(DB_PATH).st_mtime_ns
+    except OSError:
+        mtime_ns = -1
+    with _BLDG_LOCK:
+        if _BLDG_CACHE["mtime"] != mtime_ns or _BLDG_CACHE["data"] is None:
+            _BLDG_CACHE["data"] = _load_buildings_from_sqlite()
+            _BLDG_CACHE["mtime"] = mtime_ns
+        opts = _BLDG_CACHE["data"]
     if opts:
         return opts
     return [
@@ -233,6 +473,13 @@ def get_building_options() -> List[Dict[str, str]]:
         {"code": "775",   "name": "Recreation Centre North"},
     ]
 
+# Pre-warm the buildings cache at import so the first landing page is served
+# from memory; the mtime key above rebuilds it if the DB file changes.
+try:
+    get_building_options()
+except Exception:
+    pass
+
 # -----------------------------------------------------------------------------
 # DB: QR_codes upsert, assets insert/delete
 # -----------------------------------------------------------------------------
@@ -246,77 +493,120 @@ def upsert_qr_codes(conn: sqlite3.Connection, qr_code: str, building_code: str):
     bcode_candidates = ["Building Code", "Building_Code", "Code", "Property", "Bldg Code", "Bldg"]
     bcode_col = next((c for c in bcode_candidates if c in cols), None)
 
+    if not bcode_col:
+        # Nothing to update on conflict; a single OR IGNORE insert suffices.
+        conn.execute(
+            f'INSERT OR IGNORE INTO "{table}" ("QR_code_ID") VALUES (?)',
+            (qr_code,)
+        )
+        return
+
+    if sqlite3.sqlite_version_info >= (3, 24, 0):
+        # Native upsert (backed by ux_qr_codes_id): one statement, one
+        # B-tree walk, instead of probe + INSERT/UPDATE.
+        bc = _quote_ident(bcode_col)
+        conn.execute(
+            f'INSERT INTO "{table}" ("QR_code_ID", {bc}) VALUES (?, ?) '
+            f'ON CONFLICT("QR_code_ID") DO UPDATE SET {bc}=excluded.{bc}',
+            (qr_code, building_code)
+        )
+        return
+
+    # Legacy SQLite: probe then write.
     cur = conn.execute(
-        f'SELECT COUNT(*) FROM "{table}" WHERE "QR_code_ID"=?',
+        f'SELECT 1 FROM "{table}" WHERE "QR_code_ID"=? LIMIT 1',
         (qr_code,)
     )
-    exists = cur.fetchone()[0] > 0
-    if exists:
-        if bcode_col:
-            conn.execute(
-                f'UPDATE "{table}" SET {_quote_ident(bcode_col)}=? WHERE "QR_code_ID"=?',
-                (building_code, qr_code)
-            )
+    if cur.fetchone() is not None:
+        conn.execute(
+            f'UPDATE "{table}" SET {_quote_ident(bcode_col)}=? WHERE "QR_code_ID"=?',
+            (building_code, qr_code)
+        )
     else:
-        if bcode_col:
-            conn.execute(
-                f'INSERT INTO "{table}" ("QR_code_ID", {_quote_ident(bcode_col)}) VALUES (?, ?)',
-                (qr_code, building_code)
-            )
-        else:
-            conn.execute(
-                f'INSERT INTO "{table}" ("QR_code_ID") VALUES (?)',
-                (qr_code,)
-            )
+        conn.execute(
+            f'INSERT INTO "{table}" ("QR_code_ID", {_quote_ident(bcode_col)}) VALUES (?, ?)',
+            (qr_code, building_code)
+        )
+
+_SQLITE_MAX_VARS = 999  # SQLITE_MAX_VARIABLE_NUMBER default
+
+_ASSETS_INSERT_PREFIX: str | None = None
+_ASSETS_ROW_PLACEHOLDER: str | None = None
 
 def insert_into_assets(conn: sqlite3.Connection, file_bases: List[str]):
+    global _ASSETS_INSERT_PREFIX, _ASSETS_ROW_PLACEHOLDER
     table = _find_assets_table(conn)
     if not table:
-        print("[assets] No QR_*code*_assets table found; skipping inserts.")
+        logger.warning("[assets] No QR_*code*_assets table found; skipping inserts.")
         return
-    cols = set(_table_columns(conn, table))
-    if "code_assets" not in cols:
-        print(f"[assets] Table '{table}' lacks 'code_assets'; skipping inserts.")
-        return
-    idx_name = f"ux_{table}_code_assets"
-    conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "{idx_name}" ON "{table}" ("code_assets")')
-    if "api_int" in cols:
-        conn.executemany(
-            f'INSERT OR IGNORE INTO "{table}" ("code_assets","api_int") VALUES (?, 0)',
-            [(b,) for b in file_bases]
-        )
+    if _ASSETS_INSERT_PREFIX is None:
+        # First call: validate the column, ensure the unique index exists and
+        # build the final INSERT once. Later calls go straight to execute.
+        cols = set(_table_columns(conn, table))
+        if "code_assets" not in cols:
+            logger.warning("[assets] Table '%s' lacks 'code_assets'; skipping inserts.", table)
+            return
+        if "api_int" in cols:
+            _ASSETS_INSERT_PREFIX = f'INSERT OR IGNORE INTO "{table}" ("code_assets","api_int") VALUES '
+            _ASSETS_ROW_PLACEHOLDER = "(?, 0)"
+        else:
+            _ASSETS_INSERT_PREFIX = f'INSERT OR IGNORE INTO "{table}" ("code_assets") VALUES '
+            _ASSETS_ROW_PLACEHOLDER = "(?)"
+    # One bound variable per row, so the multi-row form is safe up to
+    # SQLite's default host-parameter limit; executemany covers the rest.
+    if len(file_bases) <= _SQLITE_MAX_VARS:
+        # One statement step for the whole (typically 4-row) submit.
+        placeholders = ",".join([_ASSETS_ROW_PLACEHOLDER] * len(file_bases))
+        conn.execute(_ASSETS_INSERT_PREFIX + placeholders, file_bases)
     else:
-        conn.executemany(
-            f'INSERT OR IGNORE INTO "{table}" ("code_assets") VALUES (?)',
-            [(b,) for b in file_bases]
-        )
+        conn.executemany(_ASSETS_INSERT_PREFIX + _ASSETS_ROW_PLACEHOLDER,
+                         [(b,) for b in file_bases])
 
 def delete_from_assets_by_qr(conn: sqlite3.Connection, qr_code: str):
     table = _find_assets_table(conn)
     if not table: return
     cols = set(_table_columns(conn, table))
     if "code_assets" not in cols: return
-    conn.execute(f'DELETE FROM "{table}" WHERE "code_assets" LIKE ?', (qr_code + " %",))
+    # Half-open range over the '<qr> ' prefix: unlike LIKE (case-insensitive
+    # by default, so not always index-eligible), this is guaranteed to run
+    # as a range scan on the unique code_assets index.
+    conn.execute(
+        f'DELETE FROM "{table}" WHERE "code_assets" >= ? AND "code_assets" < ?',
+        (qr_code + " ", qr_code + " \uffff")
+    )
 
-def delete_files_by_qr(qr_code: str):
-    prefix = f"{qr_code} "
-    if not os.path.isdir(UPLOAD_DIR): return
-    for fname in os.listdir(UPLOAD_DIR):
-        if fname.startswith(prefix):
-            try: os.remove(os.path.join(UPLOAD_DIR, fname))
-            except Exception: pass
+def _remove_upload_files(filenames: List[str]):
+    """Background deletion of specific upload files (overwrite leftovers)."""
+    for fname in filenames:
+        try:
+            os.remove(os.path.join(UPLOAD_DIR, fname))
+        except OSError:
+            pass
 
 def qr_exists(conn: sqlite3.Connection, qr_code: str) -> bool:
+    # Table/column checks hit the module-level schema caches after the first
+    # call; the probe itself is a single indexed EXISTS on the warm statement.
     if not _has_table(conn, "QR_codes"): return False
-    cols = set(_table_columns(conn, "QR_codes"))
-    if "QR_code_ID" not in cols: return False
-    cur = conn.execute('SELECT 1 FROM "QR_codes" WHERE "QR_code_ID"=? LIMIT 1', (qr_code,))
-    return cur.fetchone() is not None
+    if "QR_code_ID" not in _table_columns(conn, "QR_codes"): return False
+    cur = conn.execute(
+        'SELECT EXISTS(SELECT 1 FROM "QR_codes" WHERE "QR_code_ID"=? LIMIT 1)',
+        (qr_code,)
+    )
+    return bool(cur.fetchone()[0])
+
+@functools.lru_cache(maxsize=4096)
+def _qr_exists_cached(qr_code: str, bucket: int) -> bool:
+    # `bucket` changes every 30s, so repeat scans of the same QR within that
+    # window never touch the DB. Cleared explicitly on writes (see submit).
+    return qr_exists(_get_conn(), qr_code)
 
 # -----------------------------------------------------------------------------
 # Upload listing helper (for capture page)
 # -----------------------------------------------------------------------------
 ALLOWED_EXTS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif", ".tif", ".tiff")
+_ALLOWED_EXT_SET = frozenset(ALLOWED_EXTS)  # O(1) membership; tuple kept for endswith
+_RE_SEQ_SUFFIX = re.compile(r'\s-\s(\d+)$')
+_EXT_ALTERNATION = "|".join(e.lstrip(".") for e in ALLOWED_EXTS)
 
 def list_existing_uploads(qr_code: str, building_code: str, asset_type: str) -> List[Dict[str, str]]:
     safe_qr   = sanitize_component(qr_code, prefer_digits=True)
@@ -327,20 +617,31 @@ def list_existing_uploads(qr_code: str, building_code: str, asset_type: str) ->
     out = []
     if not os.path.isdir(UPLOAD_DIR):
         return out
-    for fname in os.listdir(UPLOAD_DIR):
-        if not fname.lower().endswith(ALLOWED_EXTS): continue
-        if not fname.startswith(prefix): continue
-        base, _ = os.path.splitext(fname)
-        m = re.search(r'\s-\s(\d+)$', base)
-        seq = m.group(1) if m else ""
-        out.append({
-            "filename": fname,
-            "base": base,
-            "url": url_for("uploaded_file", filename=fname),
-            "seq": seq,
-            "label": seq_to_label(asset_type, seq),
-        })
-    out.sort(key=lambda x: int(x["seq"]) if x["seq"].isdigit() else 9999)
+    # One fullmatch per directory entry replaces the prefix/extension/suffix
+    # checks; non-matches cost a single failed match. Labels are resolved
+    # through the per-type map built once outside the loop.
+    pat = re.compile(re.escape(prefix) + r'(\d+)\.(?:' + _EXT_ALTERNATION + r')$',
+                     re.IGNORECASE)
+    labels = _labels_for_type(asset_type)
+    with os.scandir(UPLOAD_DIR) as it:
+        for entry in it:
+            m = pat.match(entry.name)
+            if not m: continue
+            fname = entry.name
+            seq = m.group(1)
+            # Serve the small WebP thumbnail when the background worker has
+            # produced one; the full image stays reachable via full_url.
+            thumb = _thumb_name(fname)
+            has_thumb = os.path.exists(os.path.join(UPLOAD_DIR, thumb))
+            out.append({
+                "filename": fname,
+                "base": os.path.splitext(fname)[0],
+                "url": url_for("uploaded_file", filename=thumb if has_thumb else fname),
+                "full_url": url_for("uploaded_file", filename=fname),
+                "seq": seq,
+                "label": labels.get(int(seq), f"Photo {seq}"),
+            })
+    out.sort(key=lambda x: int(x["seq"]))
     return out
 
 # -----------------------------------------------------------------------------
@@ -363,14 +664,10 @@ def api_check_qr():
     raw = _safe_str(request.args.get("qr"))
     qr = sanitize_component(raw, prefer_digits=True)
     try:
-        conn = _open_db()
-        exists = qr_exists(conn, qr)
+        exists = _qr_exists_cached(qr, int(time.time()) // 30)
         return jsonify({"exists": bool(exists), "qr": qr})
     except Exception as e:
         return jsonify({"exists": False, "error": str(e)}), 500
-    finally:
-        try: conn.close()
-        except Exception: pass
 
 @app.route("/capture", methods=["GET", "POST"])
 def capture():
@@ -427,54 +724,86 @@ def submit():
     safe_bldg = sanitize_component(building_code, prefer_digits=False)
     safe_type = sanitize_component(type_abbrev, prefer_digits=False)
 
+    stale_files: List[str] = []
     if overwrite == "1":
         try:
-            conn = _open_db()
+            conn = _get_conn()
             delete_from_assets_by_qr(conn, safe_qr)
             conn.commit()
         except Exception as e:
             flash(f"Warning: could not clear prior DB rows for this QR ({e}).", "warning")
-        finally:
-            try: conn.close()
-            except Exception: pass
-        delete_files_by_qr(safe_qr)
+        # Don't delete files up front: re-uploaded sequences overwrite their
+        # old file in place, so only names that are NOT re-uploaded need
+        # removing — and that can happen in the background after the saves.
+        qr_prefix = f"{safe_qr} "
+        if os.path.isdir(UPLOAD_DIR):
+            with os.scandir(UPLOAD_DIR) as it:
+                stale_files = [e.name for e in it if e.name.startswith(qr_prefix)]
 
     files_saved: List[str] = []
     bases_saved: List[str] = []
 
     # Up to 4 keys exist; BF will only use 0..2 via template
+    base_prefix = f"{safe_qr} {safe_bldg} {safe_type} - "
+    pending = []
     for seq in ("0", "1", "2", "3"):
         file_key = f"image_{seq}"
         file = request.files.get(file_key)
         if not file or file.filename == "":
             continue
-        orig = secure_filename(file.filename)
-        _, ext = os.path.splitext(orig)
-        ext = (ext or ".jpg").lower()
-        if ext not in ALLOWED_EXTS:
+        # Only the extension of the client filename matters — the stored name
+        # is built entirely from sanitized components — so skip
+        # secure_filename's regex pass and take the suffix directly.
+        ext = "." + (file.filename or "").rpartition(".")[2].lower()
+        if ext not in _ALLOWED_EXT_SET:
             ext = ".jpg"
 
-        base = f"{safe_qr} {safe_bldg} {safe_type} - {seq}"
+        base = base_prefix + seq
         fname = base + ext
 
+        # UPLOAD_DIR itself is created once at import; every dest lives
+        # directly under it, so no per-file makedirs/stat is needed.
         dest = os.path.join(UPLOAD_DIR, fname)
-        os.makedirs(os.path.dirname(dest), exist_ok=True)
-        save_image_file(file, dest)
+        pending.append((file, dest, base, fname))
 
+    # The saves are independent blocking writes; issuing them together on the
+    # executor overlaps their disk latency instead of paying it 4x serially.
+    futures = [(_EXECUTOR.submit(save_image_file, f, dest), base, fname)
+               for f, dest, base, fname in pending]
+    for fut, base, fname in futures:
+        try:
+            fut.result()
+        except Exception as e:
+            flash(f"Warning: could not save {fname} ({e}).", "warning")
+            continue
         bases_saved.append(base)
         files_saved.append(fname)
 
+    if stale_files:
+        keep = set(files_saved)
+        # The background workers regenerate thumbnails for re-uploaded
+        # sequences, so keep those names out of the purge as well.
+        keep.update(_thumb_name(f) for f in files_saved)
+        leftovers = [f for f in stale_files if f not in keep]
+        if leftovers:
+            _EXECUTOR.submit(_remove_upload_files, leftovers)
+
     try:
-        conn = _open_db()
-        upsert_qr_codes(conn, qr_code=safe_qr, building_code=building_code)
-        if bases_saved:
-            insert_into_assets(conn, bases_saved)
-        conn.commit()
+        conn = _get_conn()
+        # Single transaction: one grouped fsync for the upsert + all asset
+        # rows, instead of one per statement.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            upsert_qr_codes(conn, qr_code=safe_qr, building_code=building_code)
+            if bases_saved:
+                insert_into_assets(conn, bases_saved)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        _qr_exists_cached.cache_clear()
     except Exception as e:
         flash(f"Warning: could not write to database ({e}).", "warning")
-    finally:
-        try: conn.close()
-        except Exception: pass
 
     mode = get_after_submit_mode(request.form.get("after_submit"))
     if mode == "capture":
@@ -518,24 +847,29 @@ def delete_upload():
             os.remove(dest)
         except Exception as e:
             return jsonify(ok=False, error=f"cannot delete file: {e}"), 500
+    try:
+        os.remove(os.path.join(UPLOAD_DIR, _thumb_name(filename)))
+    except OSError:
+        pass
 
     try:
-        conn = _open_db()
+        conn = _get_conn()
         table = _find_assets_table(conn)
         if table and "code_assets" in _table_columns(conn, table):
             conn.execute(f'DELETE FROM "{table}" WHERE "code_assets"=?', (base,))
             conn.commit()
     except Exception as e:
         return jsonify(ok=False, error=f"db error: {e}"), 500
-    finally:
-        try: conn.close()
-        except Exception: pass
 
     return jsonify(ok=True)
 
 @app.route("/uploads/<path:filename>")
 def uploaded_file(filename):
-    return send_from_directory(UPLOAD_DIR, filename)
+    # conditional=True honors If-Modified-Since/Range, so a browser's repeat
+    # fetch of a thumbnail returns 304 with no body. Full responses go out
+    # through wsgi.file_wrapper, which servers map to sendfile(2), and an
+    # hour of Cache-Control keeps repeat capture-page loads local.
+    return send_from_directory(UPLOAD_DIR, filename, conditional=True, max_age=3600)
 
 @app.route("/health")
 def health():
@@ -552,8 +886,11 @@ def health():
 #External Conection activity
 
 if __name__ == "__main__":
+    # Dev convenience only — production runs via wsgi.py under gunicorn
+    # or waitress (see gunicorn_conf.py).
     port = int(os.environ.get("PORT", "5001"))
+    debug = os.environ.get("FLASK_DEBUG", "0") == "1"
     print("🚀 Flask app running...")
     print(f"🔗 Open your browser and go to: http://0.0.0.0:{port}")
-    app.run(host="0.0.0.0", port=port, debug=True)
+    app.run(host="0.0.0.0", port=port, debug=debug)
 
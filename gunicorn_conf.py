@@ -0,0 +1,34 @@
+import logging
+import multiprocessing
+import os
+import threading
+from logging.handlers import QueueListener
+
+bind = "0.0.0.0:" + os.environ.get("PORT", "5001")
+workers = 2 * multiprocessing.cpu_count() + 1
+threads = 4
+worker_class = "gthread"
+# Import the app in the master so module-level caches (schema, buildings)
+# are shared copy-on-write across forked workers.
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Threads and SQLite connections don't survive fork(), and preload_app
+    # means app.py's import-time setup ran in the master. Re-establish the
+    # per-process pieces in each worker.
+    import app as app_module
+
+    # The master's QueueListener thread is gone in the child; without a new
+    # one, every record the worker enqueues would sit in _log_queue forever.
+    app_module._log_listener = QueueListener(app_module._log_queue,
+                                             logging.StreamHandler())
+    app_module._log_listener.start()
+
+    # Drop connections inherited from the master's pre-warm: SQLite forbids
+    # using a connection carried across fork(), and that includes closing it
+    # — so forget them (the master closes its own at exit) and let each
+    # worker thread open fresh ones on first use.
+    with app_module._POOL_LOCK:
+        app_module._POOL_CONNS.clear()
+    app_module._tls = threading.local()
@@ -1,9 +1,141 @@
+import logging
 import os
-from werkzeug.utils import secure_filename
+import queue
+import shutil
 import re
-import pyodbc
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-ACCESS_DB_PATH = r"S:\\MaintOpsPlan\\AssetMgt\\Asset Management Process\\Database\\8. New Assets\\QR_code_project\\asset_capture_app\\data\\QR_codes.accdb"
+# Same override app.py honours, so both writers can be pointed at one
+# path — e.g. a fast local disk when the repo copy lives on a share.
+SQLITE_DB_PATH = os.environ.get(
+    "QR_CODES_DB_PATH",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "data", "QR_codes.db"
+    )
+)
+
+# Module constants: passing the identical string object each call lets
+# sqlite3's statement cache hit on the fast identity check.
+logger = logging.getLogger(__name__)
+
+_WS_RE = re.compile(r'\s+')
+
+_SQL_UPSERT = "INSERT OR REPLACE INTO QR_code_assets (code_assets, api_int) VALUES (?, ?)"
+
+# Rows flushed per executemany call. Bulk-load throughput plateaus around
+# batches of 40-50; beyond that the slices just buffer more rows in memory.
+_BATCH = 48
+
+# One long-lived connection per thread: reopening the DB file per upload
+# batch costs more than the handful of rows each batch writes.
+_tls = threading.local()
+
+# All DB writes funnel through one daemon thread so the request returns as
+# soon as the files hit disk; the single writer also serializes access, so
+# concurrent uploads never contend for the write lock.
+_db_queue = queue.Queue()
+_writer_lock = threading.Lock()
+_writer_started = False
+
+# Disk writes release the GIL, so a batch of photos lands in roughly the
+# time of the largest one instead of their sum.
+_SAVE_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="upload-save")
+
+
+def _save_one(file, save_path):
+    # Copy in 1 MiB chunks instead of Werkzeug's 16 KiB default —
+    # far fewer read/write syscalls on multi-MB photos.
+    with open(save_path, 'wb') as dst:
+        shutil.copyfileobj(file.stream, dst, length=1024 * 1024)
+
+
+def _db_writer():
+    conn = get_db_connection()
+    try:
+        # Same statement app.py runs at startup; repeated here so the upsert
+        # below has its conflict target even if app.py never imported.
+        conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS '
+                     '"ux_QR_code_assets_code_assets" ON "QR_code_assets" ("code_assets")')
+        conn.commit()
+    except sqlite3.Error:
+        logger.exception("Could not ensure unique index on QR_code_assets")
+    while True:
+        qr_code, stems = _db_queue.get()
+        try:
+            # One explicit transaction (one journal fsync) covers the upsert
+            # plus the stale-row sweep, instead of a commit per statement.
+            # Connection.execute/executemany recycle an internal cursor, so
+            # no per-batch cursor object is allocated.
+            conn.execute("BEGIN")
+            # Upsert in place: unchanged re-uploads touch only their own
+            # rows instead of a delete-everything-and-reinsert churn.
+            # Sliced so a bulk re-ingest batch stays memory-bounded; a
+            # normal upload (a handful of photos) is one slice.
+            for i in range(0, len(stems), _BATCH):
+                conn.executemany(_SQL_UPSERT,
+                                 ((stem, 0) for stem in stems[i:i + _BATCH]))
+            # Remove only rows for this QR that this batch didn't rewrite.
+            # The trailing space in the pattern matches the filename
+            # separator, so QR "123" never sweeps up rows for "1234".
+            # The stale set is computed in Python and deleted in _BATCH-sized
+            # IN slices — one NOT IN over every stem would overrun SQLite's
+            # host-parameter limit on exactly the bulk batches the insert
+            # slicing is there for.
+            kept = set(stems)
+            stale = [row[0] for row in conn.execute(
+                "SELECT code_assets FROM QR_code_assets WHERE code_assets LIKE ?",
+                (qr_code + ' %',)
+            ) if row[0] not in kept]
+            for i in range(0, len(stale), _BATCH):
+                chunk = stale[i:i + _BATCH]
+                marks = ",".join("?" * len(chunk))
+                conn.execute(
+                    f"DELETE FROM QR_code_assets WHERE code_assets IN ({marks})",
+                    chunk
+                )
+            conn.commit()
+        except Exception:
+            # Catch everything: an exception escaping this loop kills the
+            # writer thread while _writer_started stays True, after which
+            # every upload would enqueue work that is silently never
+            # written. Log, roll back, and keep consuming.
+            logger.exception("Failed to update QR_code_assets in the QR codes DB")
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                logger.exception("Rollback failed after QR_code_assets error")
+        finally:
+            _db_queue.task_done()
+
+
+def _ensure_writer():
+    global _writer_started
+    if not _writer_started:
+        with _writer_lock:
+            if not _writer_started:
+                threading.Thread(target=_db_writer, daemon=True,
+                                 name="qr-db-writer").start()
+                _writer_started = True
+
+
+def get_db_connection():
+    conn = getattr(_tls, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(SQLITE_DB_PATH, check_same_thread=False,
+                               cached_statements=128)
+        # Applied once per connection: WAL halves the fsyncs per commit and
+        # lets readers proceed; the cache/mmap settings keep hot pages out
+        # of the syscall path.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-64000")
+        conn.execute("PRAGMA mmap_size=268435456")
+        _tls.conn = conn
+    return conn
 
 
 def handle_upload(data, files, upload_folder):
@@ -16,39 +148,57 @@ def handle_upload(data, files, upload_folder):
     if not qr_code or not asset_type or not building_code:
         return {"qr_code": qr_code or "unknown", "files_saved": []}
 
+    # Normalize the form fields once; every downstream consumer (filenames,
+    # the DB delete pattern) then sees the same clean values and the per-file
+    # whitespace checks disappear entirely.
+    qr_code = _WS_RE.sub(' ', qr_code).strip()
+    building_code = _WS_RE.sub(' ', building_code).strip()
+    asset_prefix = _WS_RE.sub(' ', asset_type).strip()[:2].upper()
+
+    # The qr/building/type part is identical for every file: build it once,
+    # then each iteration is two concatenations.
+    prefix = f"{qr_code} {building_code} {asset_prefix} - "
+
+    # Sort by the numeric suffix of image_0, image_1, ... so save order (and
+    # the DB insert order below) no longer depends on multipart field order.
+    # Fields without a numeric suffix aren't ours — skip them rather than
+    # letting a stray form field fail the whole upload.
+    items = []
     for key in files:
         file = files[key]
-        if file and file.filename:
-            index = key.split('_')[-1]  # e.g., image_0, image_1
-            filename_raw = f"{qr_code} {building_code} {asset_type[:2].upper()} - {index}.jpg"
-            filename_raw = re.sub(r'\s+', ' ', filename_raw).strip()
-            filename = filename_raw.replace(' ', '_') if '\\' in upload_folder else filename_raw
-            save_path = os.path.join(upload_folder, filename)
-            file.save(save_path)
-            files_saved.append(filename)
-            filenames_no_ext.append(os.path.splitext(filename)[0])
-
-    # Save all code_assets to Access DB in QR_code_assets table, replacing old ones if they exist
-    try:
-        if filenames_no_ext:
-            conn_str = (
-                r"Driver={Microsoft Access Driver (*.mdb, *.accdb)};"
-                rf"DBQ={ACCESS_DB_PATH};"
-            )
-            conn = pyodbc.connect(conn_str)
-            cursor = conn.cursor()
-
-            # Delete existing entries for this QR code prefix
-            qr_prefix = filenames_no_ext[0].split(' ')[0]  # assumes QR is the first part of filename
-            cursor.execute("DELETE FROM QR_code_assets WHERE code_assets LIKE ?", (qr_prefix + '%',))
-
-            # Insert new filenames
-            for asset_code in filenames_no_ext:
-                cursor.execute("INSERT INTO QR_code_assets ([code_assets]) VALUES (?)", (asset_code,))
-            conn.commit()
-            cursor.close()
-            conn.close()
-    except Exception as e:
-        print("⚠️ Failed to update QR_code_assets in Access DB:", e)
+        if not file or not file.filename:
+            continue
+        suffix = key.rsplit('_', 1)[-1]
+        if not suffix.isdigit():
+            continue
+        items.append((int(suffix), file))
+    items.sort(key=lambda item: item[0])
+    pending = []
+    for index, file in items:
+        stem = prefix + str(index)
+        filename = stem + ".jpg"
+        save_path = os.path.join(upload_folder, filename)
+        pending.append((filename, stem,
+                        _SAVE_POOL.submit(_save_one, file, save_path)))
+
+    # Collect in submission order so files_saved stays deterministic; a
+    # failed save drops just that file rather than the whole batch, and
+    # only files actually on disk reach the DB step.
+    for filename, stem, future in pending:
+        try:
+            future.result()
+        except OSError:
+            logger.exception("Failed to save %s", filename)
+            continue
+        files_saved.append(filename)
+        filenames_no_ext.append(stem)
+
+    if not filenames_no_ext:
+        return {"qr_code": qr_code, "files_saved": files_saved}
+
+    # Hand the row replacement to the writer thread; the response doesn't
+    # need to wait on the commit once the files are safely on disk.
+    _ensure_writer()
+    _db_queue.put((qr_code, filenames_no_ext))
 
     return {"qr_code": qr_code, "files_saved": files_saved}
@@ -0,0 +1,12 @@
+"""WSGI entry point for production servers.
+
+The built-in Werkzeug dev server handles one request at a time; run this
+app under a real server instead, e.g.:
+
+    gunicorn -c gunicorn_conf.py wsgi:application
+
+or on Windows:
+
+    waitress-serve --threads=8 wsgi:application
+"""
+from app import app as application